@@ -1,9 +1,10 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import json
 import logging
 from datetime import datetime
 
 from engine import WorkflowEngine, Task, TaskStatus, DAG
+from serialization import dumps
 from scheduler import Scheduler, Schedule
 from triggers import TriggerManager, Trigger, TriggerType
 
@@ -16,6 +17,21 @@ trigger_manager = TriggerManager()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_TRIGGER_TYPE_MAP = {t.value: t for t in TriggerType}
+
+
+def _identity_task(**kwargs):
+    return kwargs
+
+
+def _stream_runs(runs):
+    yield b'{"runs":['
+    first = True
+    for run in runs:
+        yield (b"" if first else b",") + dumps(run, indent=False)
+        first = False
+    yield b"]}"
+
 
 @app.route("/health", methods=["GET"])
 def health():
@@ -43,7 +59,7 @@ def create_dag():
     for task_data in data.get("tasks", []):
         task = Task(
             task_id=task_data["task_id"],
-            func=lambda **kwargs: kwargs,
+            func=_identity_task,
             params=task_data.get("params", {}),
             depends_on=task_data.get("depends_on", []),
         )
@@ -73,8 +89,8 @@ def run_dag(dag_id):
 @app.route("/runs", methods=["GET"])
 def list_runs():
     dag_id = request.args.get("dag_id")
-    runs = engine.list_runs(dag_id)
-    return jsonify({"runs": runs})
+    runs = engine.iter_runs(dag_id)
+    return Response(_stream_runs(runs), mimetype="application/json")
 
 
 @app.route("/runs/<run_id>", methods=["GET"])
@@ -126,7 +142,13 @@ def create_trigger():
     if not trigger_id:
         return jsonify({"error": "trigger_id required"}), 400
 
-    trigger = Trigger(trigger_id, TriggerType(trigger_type))
+    tt = None
+    if isinstance(trigger_type, str):
+        tt = _TRIGGER_TYPE_MAP.get(trigger_type)
+    if tt is None:
+        return jsonify({"error": "invalid trigger_type"}), 400
+
+    trigger = Trigger(trigger_id, tt)
     trigger_manager.register_trigger(trigger)
 
     return jsonify({"trigger_id": trigger_id, "status": "created"})
@@ -1,17 +1,32 @@
 import os
-import json
 import logging
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Dict, List, Any, Callable, Optional
-import hashlib
+from functools import lru_cache
+from typing import Dict, List, Any, Callable, Iterator, Optional
+import secrets
 import time
 import traceback
 
-logging.basicConfig(level=logging.INFO)
+from serialization import atomic_write, dumps, loads
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1024)
+def _read_run_cached(path: str, mtime_ns: int) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _format_ns(ts: Optional[int]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts / 1e9).isoformat()
+
+
 class TaskStatus(Enum):
     PENDING = "pending"
     RUNNING = "running"
@@ -21,6 +36,20 @@ class TaskStatus(Enum):
 
 
 class Task:
+    __slots__ = (
+        "task_id",
+        "func",
+        "params",
+        "depends_on",
+        "status",
+        "result",
+        "error",
+        "started_at",
+        "completed_at",
+        "try_count",
+        "_frozen_dict",
+    )
+
     def __init__(
         self,
         task_id: str,
@@ -35,72 +64,109 @@ class Task:
         self.status = TaskStatus.PENDING
         self.result = None
         self.error = None
-        self.started_at = None
-        self.completed_at = None
+        self.started_at: Optional[int] = None
+        self.completed_at: Optional[int] = None
         self.try_count = 0
+        self._frozen_dict: Optional[Dict] = None
 
     def execute(self) -> Any:
         self.status = TaskStatus.RUNNING
-        self.started_at = datetime.now().isoformat()
+        self._frozen_dict = None
+        self.started_at = time.time_ns()
         self.try_count += 1
 
         try:
-            logger.info(f"Executing task: {self.task_id}")
+            logger.info("Executing task: %s", self.task_id)
             self.result = self.func(**self.params)
-            self.status = TaskStatus.SUCCESS
-            logger.info(f"Task {self.task_id} completed successfully")
         except Exception as e:
-            self.status = TaskStatus.FAILED
             self.error = str(e)
-            logger.error(f"Task {self.task_id} failed: {e}")
+            self.completed_at = time.time_ns()
+            self.status = TaskStatus.FAILED
+            self._freeze()
+            logger.error("Task %s failed: %s", self.task_id, e)
             raise
-        finally:
-            self.completed_at = datetime.now().isoformat()
 
-    def to_dict(self) -> Dict:
+        self.completed_at = time.time_ns()
+        self.status = TaskStatus.SUCCESS
+        self._freeze()
+        logger.info("Task %s completed successfully", self.task_id)
+
+    def skip(self):
+        self.status = TaskStatus.SKIPPED
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.completed_at = None
+        self._freeze()
+
+    def _freeze(self):
+        # Only called once every field of a terminal task has been written;
+        # the dict is reused until the task is executed again.
+        self._frozen_dict = self._build_dict()
+
+    def _build_dict(self) -> Dict:
         return {
             "task_id": self.task_id,
             "status": self.status.value,
             "result": str(self.result) if self.result else None,
             "error": self.error,
-            "started_at": self.started_at,
-            "completed_at": self.completed_at,
+            "started_at": _format_ns(self.started_at),
+            "completed_at": _format_ns(self.completed_at),
             "try_count": self.try_count,
         }
 
+    def to_dict(self) -> Dict:
+        frozen = self._frozen_dict
+        if frozen is not None:
+            return frozen
+        return self._build_dict()
+
 
 class DAG:
     def __init__(self, dag_id: str):
         self.dag_id = dag_id
         self.tasks: Dict[str, Task] = {}
         self.execution_order: List[str] = []
+        self._dependents: Dict[str, List[str]] = {}
+        self._order_stale = True
 
     def add_task(self, task: Task):
+        previous = self.tasks.get(task.task_id)
+        if previous is not None:
+            for dep in previous.depends_on:
+                self._dependents[dep].remove(task.task_id)
         self.tasks[task.task_id] = task
+        for dep in task.depends_on:
+            self._dependents.setdefault(dep, []).append(task.task_id)
+        self._order_stale = True
 
     def topological_sort(self) -> List[str]:
+        if not self._order_stale:
+            return self.execution_order
+
         in_degree = {tid: 0 for tid in self.tasks}
         for task in self.tasks.values():
             for dep in task.depends_on:
                 if dep in in_degree:
                     in_degree[task.task_id] += 1
 
-        queue = [tid for tid, deg in in_degree.items() if deg == 0]
+        queue = deque(tid for tid, deg in in_degree.items() if deg == 0)
         self.execution_order = []
 
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             self.execution_order.append(current)
 
-            for task in self.tasks.values():
-                if current in task.depends_on:
-                    in_degree[task.task_id] -= 1
-                    if in_degree[task.task_id] == 0:
-                        queue.append(task.task_id)
+            for dependent in self._dependents.get(current, ()):
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
 
+        self._order_stale = False
         return self.execution_order
 
     def get_ready_tasks(self, completed: List[str]) -> List[Task]:
+        completed = set(completed)
         ready = []
         for task in self.tasks.values():
             if task.status == TaskStatus.PENDING:
@@ -117,15 +183,16 @@ class DAG:
 
 
 class WorkflowEngine:
-    def __init__(self, storage_path="workflows"):
+    def __init__(self, storage_path="workflows", max_in_memory_runs: int = 1000):
         self.storage_path = storage_path
+        self.max_in_memory_runs = max_in_memory_runs
         self.dags: Dict[str, DAG] = {}
-        self.runs: Dict[str, Dict] = {}
+        self.runs: "OrderedDict[str, Dict]" = OrderedDict()
         os.makedirs(storage_path, exist_ok=True)
 
     def register_dag(self, dag: DAG):
         self.dags[dag.dag_id] = dag
-        logger.info(f"Registered DAG: {dag.dag_id}")
+        logger.info("Registered DAG: %s", dag.dag_id)
 
     def run_dag(self, dag_id: str, max_parallel: int = 4) -> str:
         if dag_id not in self.dags:
@@ -134,7 +201,7 @@ class WorkflowEngine:
         dag = self.dags[dag_id]
         dag.topological_sort()
 
-        run_id = hashlib.md5(f"{dag_id}{datetime.now()}".encode()).hexdigest()[:12]
+        run_id = secrets.token_hex(6)
 
         run = {
             "run_id": run_id,
@@ -144,54 +211,126 @@ class WorkflowEngine:
             "completed_at": None,
             "tasks_completed": [],
             "tasks_failed": [],
+            "tasks_skipped": [],
         }
 
         self.runs[run_id] = run
-        logger.info(f"Starting run {run_id} for DAG {dag_id}")
-
-        completed = []
-        failed = []
-
-        while len(completed) + len(failed) < len(dag.tasks):
-            ready_tasks = dag.get_ready_tasks(completed)
-
-            for task in ready_tasks[:max_parallel]:
-                try:
-                    task.execute()
-                    completed.append(task.task_id)
+        logger.info("Starting run %s for DAG %s", run_id, dag_id)
+
+        completed = set()
+        failed = set()
+        remaining_deps = {tid: set(t.depends_on) for tid, t in dag.tasks.items()}
+        ready = deque(tid for tid, deps in remaining_deps.items() if not deps)
+
+        in_flight: Dict[Future, Task] = {}
+
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            while len(completed) + len(failed) < len(dag.tasks):
+                while ready and len(in_flight) < max_parallel:
+                    task = dag.tasks[ready.popleft()]
+                    in_flight[executor.submit(task.execute)] = task
+
+                if not in_flight:
+                    # Whatever is left depends on a failed or missing task,
+                    # or sits on a cycle.
+                    for tid, task in dag.tasks.items():
+                        if tid not in completed and tid not in failed:
+                            task.skip()
+                            run["tasks_skipped"].append(tid)
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    if future.exception() is not None:
+                        failed.add(task.task_id)
+                        run["tasks_failed"].append(task.task_id)
+                        continue
+
+                    completed.add(task.task_id)
                     run["tasks_completed"].append(task.task_id)
-                except Exception as e:
-                    failed.append(task.task_id)
-                    run["tasks_failed"].append(task.task_id)
-
-            time.sleep(0.1)
-
-        run["status"] = "completed" if not failed else "failed"
+                    for dependent in dag._dependents.get(task.task_id, ()):
+                        deps = remaining_deps[dependent]
+                        deps.discard(task.task_id)
+                        if not deps:
+                            ready.append(dependent)
+
+        if failed or run["tasks_skipped"]:
+            run["status"] = "failed"
+        else:
+            run["status"] = "completed"
         run["completed_at"] = datetime.now().isoformat()
 
         self._save_run(run)
-        logger.info(f"Run {run_id} {run['status']}")
+        self.runs.move_to_end(run_id)
+        self._evict_runs()
+        logger.info("Run %s %s", run_id, run["status"])
 
         return run_id
 
     def _save_run(self, run: Dict):
         filepath = os.path.join(self.storage_path, f"{run['run_id']}.json")
-        with open(filepath, "w") as f:
-            json.dump(run, f, indent=2)
+        atomic_write(filepath, dumps(run))
+
+    def _evict_runs(self):
+        # Finished runs are on disk, so the oldest can be dropped from memory.
+        while len(self.runs) > self.max_in_memory_runs:
+            oldest = next(iter(self.runs.values()))
+            if oldest["status"] == "running":
+                break
+            self.runs.popitem(last=False)
 
     def get_run(self, run_id: str) -> Optional[Dict]:
+        if run_id in self.runs:
+            return self.runs[run_id]
+
         filepath = os.path.join(self.storage_path, f"{run_id}.json")
-        if os.path.exists(filepath):
-            with open(filepath, "r") as f:
-                return json.load(f)
-        return None
+        try:
+            st = os.stat(filepath)
+        except FileNotFoundError:
+            return None
+        return loads(_read_run_cached(filepath, st.st_mtime_ns))
+
+    def iter_runs(self, dag_id: str = None) -> Iterator[Dict]:
+        # Yields runs only held on disk first, oldest saved first, then the
+        # in-memory runs in the order they started. The in-memory runs are
+        # snapshotted up front: callers may consume this lazily while other
+        # threads start, finish and evict runs.
+        in_memory = list(self.runs.values())
+        in_memory_ids = {run["run_id"] for run in in_memory}
+
+        persisted = []
+        with os.scandir(self.storage_path) as entries:
+            for entry in entries:
+                run_id, ext = os.path.splitext(entry.name)
+                if ext != ".json" or run_id in in_memory_ids:
+                    continue
+                try:
+                    persisted.append((entry.stat().st_mtime_ns, entry.name, run_id))
+                except FileNotFoundError:
+                    continue
+        persisted.sort()
+
+        for _, name, run_id in persisted:
+            try:
+                run = self.get_run(run_id)
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable run file: %s", name)
+                continue
+            if run is None:
+                continue
+            if not isinstance(run, dict) or "dag_id" not in run:
+                logger.warning("Skipping run file that is not a run: %s", name)
+                continue
+            if dag_id is None or run["dag_id"] == dag_id:
+                yield run
 
-    def list_runs(self, dag_id: str = None) -> List[Dict]:
-        runs = []
-        for run in self.runs.values():
+        for run in in_memory:
             if dag_id is None or run["dag_id"] == dag_id:
-                runs.append(run)
-        return runs
+                yield run
+
+    def list_runs(self, dag_id: str = None) -> List[Dict]:
+        return list(self.iter_runs(dag_id))
 
     def get_dag_status(self, dag_id: str) -> Dict:
         if dag_id not in self.dags:
@@ -207,21 +346,23 @@ class WorkflowEngine:
 
 
 def sample_task_1(**kwargs):
-    logger.info(f"Task 1 running with {kwargs}")
+    logger.info("Task 1 running with %s", kwargs)
     return "task_1_result"
 
 
 def sample_task_2(**kwargs):
-    logger.info(f"Task 2 running with {kwargs}")
+    logger.info("Task 2 running with %s", kwargs)
     return "task_2_result"
 
 
 def sample_task_3(**kwargs):
-    logger.info(f"Task 3 running with {kwargs}")
+    logger.info("Task 3 running with %s", kwargs)
     return "task_3_result"
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     engine = WorkflowEngine()
 
     dag = DAG("sample_dag")
@@ -1,7 +1,17 @@
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-import json
+from typing import Dict, List, Optional, Tuple
+import atexit
+import heapq
+import logging
 import os
+import queue
+import threading
+
+from serialization import atomic_write, dumps, loads
+
+logger = logging.getLogger(__name__)
+
+_SAVE = object()
 
 
 class Schedule:
@@ -12,6 +22,11 @@ class Schedule:
         self.enabled = True
         self.last_run = None
         self.next_run = None
+        self._static_repr = {
+            "dag_id": dag_id,
+            "schedule_type": schedule_type,
+            "interval": interval,
+        }
 
     def calculate_next_run(self) -> datetime:
         if self.schedule_type == "daily":
@@ -32,9 +47,7 @@ class Schedule:
 
     def to_dict(self) -> Dict:
         return {
-            "dag_id": self.dag_id,
-            "schedule_type": self.schedule_type,
-            "interval": self.interval,
+            **self._static_repr,
             "enabled": self.enabled,
             "last_run": self.last_run,
             "next_run": self.next_run.isoformat() if self.next_run else None,
@@ -45,33 +58,84 @@ class Scheduler:
     def __init__(self, storage_path="schedules"):
         self.storage_path = storage_path
         self.schedules: Dict[str, Schedule] = {}
+        # Min-heap of (next_run, dag_id); entries whose time no longer matches
+        # _heap_times[dag_id] are stale and skipped when popped.
+        self._heap: List[Tuple[datetime, str]] = []
+        self._heap_times: Dict[str, datetime] = {}
         os.makedirs(storage_path, exist_ok=True)
         self._load_schedules()
+        self._write_q: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+        # The writer is a daemon thread, so drain pending saves before the
+        # interpreter exits rather than losing them.
+        atexit.register(self.flush)
 
     def _load_schedules(self):
-        if os.path.exists(os.path.join(self.storage_path, "schedules.json")):
-            with open(os.path.join(self.storage_path, "schedules.json"), "r") as f:
-                data = json.load(f)
-                for dag_id, sched_data in data.items():
-                    sched = Schedule(
-                        dag_id, sched_data["schedule_type"], sched_data.get("interval")
-                    )
-                    sched.enabled = sched_data.get("enabled", True)
-                    self.schedules[dag_id] = sched
+        path = os.path.join(self.storage_path, "schedules.json")
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return
+
+        data = loads(raw)
+        for dag_id, sched_data in data.items():
+            sched = Schedule(
+                dag_id, sched_data["schedule_type"], sched_data.get("interval")
+            )
+            sched.enabled = sched_data.get("enabled", True)
+            self.schedules[dag_id] = sched
+            self._push_schedule(sched)
+
+    def _push_schedule(self, schedule: Schedule):
+        # A schedule without a next_run is always due.
+        run_at = schedule.next_run or datetime.min
+        if self._heap_times.get(schedule.dag_id) != run_at:
+            self._heap_times[schedule.dag_id] = run_at
+            heapq.heappush(self._heap, (run_at, schedule.dag_id))
 
     def _save_schedules(self):
-        data = {dag_id: sched.to_dict() for dag_id, sched in self.schedules.items()}
-        with open(os.path.join(self.storage_path, "schedules.json"), "w") as f:
-            json.dump(data, f, indent=2)
+        self._write_q.put_nowait(_SAVE)
+
+    def _write_schedules(self):
+        schedules = list(self.schedules.items())
+        data = {dag_id: sched.to_dict() for dag_id, sched in schedules}
+        payload = dumps(data)
+        atomic_write(os.path.join(self.storage_path, "schedules.json"), payload)
+
+    def _writer_loop(self):
+        while True:
+            self._write_q.get()
+            pending = 1
+            # Coalesce saves queued while the previous write was running.
+            while True:
+                try:
+                    self._write_q.get_nowait()
+                except queue.Empty:
+                    break
+                pending += 1
+            try:
+                self._write_schedules()
+            except Exception:
+                logger.exception("Failed to save schedules")
+            finally:
+                for _ in range(pending):
+                    self._write_q.task_done()
+
+    def flush(self):
+        self._write_q.join()
 
     def add_schedule(self, schedule: Schedule):
         self.schedules[schedule.dag_id] = schedule
         schedule.calculate_next_run()
+        self._push_schedule(schedule)
         self._save_schedules()
 
     def remove_schedule(self, dag_id: str):
         if dag_id in self.schedules:
             del self.schedules[dag_id]
+            self._heap_times.pop(dag_id, None)
             self._save_schedules()
 
     def enable_schedule(self, dag_id: str):
@@ -85,16 +149,30 @@ class Scheduler:
             self._save_schedules()
 
     def get_pending_runs(self) -> List[str]:
-        pending = []
-        for dag_id, schedule in self.schedules.items():
-            if schedule.should_run():
-                pending.append(dag_id)
-        return pending
+        now = datetime.now()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            run_at, dag_id = heapq.heappop(self._heap)
+            if self._heap_times.get(dag_id) != run_at:
+                continue
+            del self._heap_times[dag_id]
+            schedule = self.schedules[dag_id]
+            if (schedule.next_run or datetime.min) != run_at:
+                # next_run was recalculated outside the scheduler.
+                self._push_schedule(schedule)
+                continue
+            due.append(schedule)
+
+        # Due schedules stay due until mark_run moves their next_run.
+        for schedule in due:
+            self._push_schedule(schedule)
+        return [schedule.dag_id for schedule in due if schedule.enabled]
 
     def mark_run(self, dag_id: str):
         if dag_id in self.schedules:
             self.schedules[dag_id].last_run = datetime.now().isoformat()
             self.schedules[dag_id].calculate_next_run()
+            self._push_schedule(self.schedules[dag_id])
             self._save_schedules()
 
     def list_schedules(self) -> List[Dict]:
@@ -1,12 +1,22 @@
 import unittest
+import hashlib
+import hmac
+import logging
 import os
+import shutil
+import stat
+import subprocess
 import sys
+import tempfile
+import threading
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from api import app
 from engine import WorkflowEngine, Task, TaskStatus, DAG
 from scheduler import Scheduler, Schedule
-from triggers import TriggerManager, Trigger, TriggerType
+from serialization import atomic_write
+from triggers import TriggerManager, Trigger, TriggerType, WebhookTrigger
 
 
 class TestWorkflowEngine(unittest.TestCase):
@@ -27,6 +37,44 @@ class TestWorkflowEngine(unittest.TestCase):
         self.assertEqual(task.result, 5)
         self.assertEqual(task.status, TaskStatus.SUCCESS)
 
+    def test_task_to_dict_after_rerun(self):
+        task = Task("task_1", lambda x: x, {"x": 1})
+        task.execute()
+        self.assertEqual(task.to_dict()["result"], "1")
+
+        task.params = {"x": 2}
+        task.execute()
+        self.assertEqual(task.to_dict()["result"], "2")
+        self.assertEqual(task.to_dict()["try_count"], 2)
+
+        task.skip()
+        self.assertEqual(task.to_dict()["status"], "skipped")
+
+    def test_task_to_dict_during_execution(self):
+        seen = []
+
+        class ToDictHandler(logging.Handler):
+            def emit(self, record):
+                if "completed successfully" in record.getMessage():
+                    seen.append(task.to_dict())
+
+        task = Task("task_1", lambda: seen.append(task.to_dict()) or 1)
+        handler = ToDictHandler()
+        engine_logger = logging.getLogger("engine")
+        engine_logger.addHandler(handler)
+        self.addCleanup(engine_logger.removeHandler, handler)
+        previous_level = engine_logger.level
+        engine_logger.setLevel(logging.INFO)
+        self.addCleanup(engine_logger.setLevel, previous_level)
+
+        task.execute()
+
+        self.assertEqual(seen[0]["status"], "running")
+        self.assertIsNone(seen[0]["completed_at"])
+        self.assertIsNotNone(seen[1]["completed_at"])
+        self.assertEqual(task.to_dict()["status"], "success")
+        self.assertIsNotNone(task.to_dict()["completed_at"])
+
     def test_dag_creation(self):
         dag = DAG("test_dag")
         dag.add_task(Task("task_1", lambda: None))
@@ -42,6 +90,20 @@ class TestWorkflowEngine(unittest.TestCase):
         order = dag.topological_sort()
         self.assertEqual(order[0], "task_1")
 
+    def test_topological_sort_chain(self):
+        dag = DAG("test_dag")
+        dag.add_task(Task("task_3", lambda: None, depends_on=["task_2"]))
+        dag.add_task(Task("task_2", lambda: None, depends_on=["task_1"]))
+        dag.add_task(Task("task_1", lambda: None))
+
+        order = dag.topological_sort()
+        self.assertEqual(order, ["task_1", "task_2", "task_3"])
+
+        dag.add_task(Task("task_0", lambda: None))
+        dag.add_task(Task("task_1", lambda: None, depends_on=["task_0"]))
+        order = dag.topological_sort()
+        self.assertEqual(order, ["task_0", "task_1", "task_2", "task_3"])
+
     def test_run_dag(self):
         def add_numbers(x, y):
             return x + y
@@ -56,6 +118,140 @@ class TestWorkflowEngine(unittest.TestCase):
         run = self.engine.get_run(run_id)
         self.assertEqual(run["status"], "completed")
 
+    def test_get_run_from_disk(self):
+        dag = DAG("test_dag")
+        dag.add_task(Task("task_1", lambda: None))
+
+        self.engine.register_dag(dag)
+        run_id = self.engine.run_dag("test_dag")
+
+        other = WorkflowEngine(storage_path="test_workflows")
+        self.assertEqual(other.get_run(run_id), self.engine.get_run(run_id))
+        self.assertIsNone(other.get_run("missing"))
+
+    def test_finished_runs_evicted_from_memory(self):
+        storage_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_path)
+        engine = WorkflowEngine(storage_path=storage_path, max_in_memory_runs=1)
+        dag = DAG("test_dag")
+        dag.add_task(Task("task_1", lambda: None))
+        engine.register_dag(dag)
+
+        first = engine.run_dag("test_dag")
+        second = engine.run_dag("test_dag")
+
+        self.assertEqual(list(engine.runs), [second])
+        self.assertEqual(engine.get_run(first)["status"], "completed")
+        self.assertEqual(
+            {r["run_id"] for r in engine.list_runs("test_dag")}, {first, second}
+        )
+
+    def test_list_runs_skips_unreadable_files(self):
+        storage_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_path)
+        engine = WorkflowEngine(storage_path=storage_path)
+        dag = DAG("test_dag")
+        dag.add_task(Task("task_1", lambda: None))
+        engine.register_dag(dag)
+        run_id = engine.run_dag("test_dag")
+
+        bad_files = {
+            "abc.json": '{"run_id": "abc", "dag_',
+            "list.json": "[]",
+            "no_dag.json": '{"run_id": "no_dag"}',
+        }
+        for name, content in bad_files.items():
+            with open(os.path.join(storage_path, name), "w") as f:
+                f.write(content)
+
+        other = WorkflowEngine(storage_path=storage_path)
+        with self.assertLogs("engine", level="WARNING") as logs:
+            runs = other.list_runs()
+        self.assertEqual([r["run_id"] for r in runs], [run_id])
+        self.assertEqual(len(logs.records), len(bad_files))
+
+    def test_list_runs_order(self):
+        storage_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_path)
+        engine = WorkflowEngine(storage_path=storage_path, max_in_memory_runs=1)
+        dag = DAG("test_dag")
+        dag.add_task(Task("task_1", lambda: None))
+        engine.register_dag(dag)
+
+        run_ids = [engine.run_dag("test_dag") for _ in range(3)]
+        for i, run_id in enumerate(run_ids):
+            os.utime(os.path.join(storage_path, f"{run_id}.json"), (i, i))
+
+        self.assertEqual([r["run_id"] for r in engine.list_runs()], run_ids)
+        other = WorkflowEngine(storage_path=storage_path)
+        self.assertEqual([r["run_id"] for r in other.list_runs()], run_ids)
+
+    def test_run_file_mode_matches_umask(self):
+        dag = DAG("test_dag")
+        dag.add_task(Task("task_1", lambda: None))
+        self.engine.register_dag(dag)
+        run_id = self.engine.run_dag("test_dag")
+
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = os.stat(os.path.join("test_workflows", f"{run_id}.json")).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o666 & ~umask)
+
+    def test_run_dag_skips_dependents_of_failed_task(self):
+        should_fail = False
+
+        def maybe_fail():
+            if should_fail:
+                raise RuntimeError("boom")
+            return 1
+
+        dag = DAG("failing_dag")
+        dag.add_task(Task("task_1", maybe_fail))
+        dag.add_task(Task("task_2", lambda: 2, depends_on=["task_1"]))
+
+        self.engine.register_dag(dag)
+        self.engine.run_dag("failing_dag")
+        self.assertEqual(dag.to_dict()["tasks"]["task_2"]["result"], "2")
+
+        should_fail = True
+        run_id = self.engine.run_dag("failing_dag")
+
+        run = self.engine.get_run(run_id)
+        self.assertEqual(run["status"], "failed")
+        self.assertEqual(run["tasks_failed"], ["task_1"])
+        self.assertEqual(dag.tasks["task_2"].status, TaskStatus.SKIPPED)
+        self.assertEqual(run["tasks_skipped"], ["task_2"])
+        task_2 = dag.to_dict()["tasks"]["task_2"]
+        self.assertEqual(task_2["status"], "skipped")
+        self.assertIsNone(task_2["result"])
+        self.assertIsNone(task_2["started_at"])
+        self.assertIsNone(task_2["completed_at"])
+
+    def test_run_dag_with_missing_dependency_fails(self):
+        dag = DAG("missing_dep_dag")
+        dag.add_task(Task("task_1", lambda: None, depends_on=["nope"]))
+
+        self.engine.register_dag(dag)
+        run_id = self.engine.run_dag("missing_dep_dag")
+
+        run = self.engine.get_run(run_id)
+        self.assertEqual(run["status"], "failed")
+        self.assertEqual(run["tasks_completed"], [])
+        self.assertEqual(run["tasks_skipped"], ["task_1"])
+
+    def test_run_dag_executes_ready_tasks_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        dag = DAG("parallel_dag")
+        dag.add_task(Task("task_1", barrier.wait))
+        dag.add_task(Task("task_2", barrier.wait))
+
+        self.engine.register_dag(dag)
+        run_id = self.engine.run_dag("parallel_dag", max_parallel=2)
+
+        run = self.engine.get_run(run_id)
+        self.assertEqual(run["status"], "completed")
+
 
 class TestScheduler(unittest.TestCase):
     def setUp(self):
@@ -83,6 +279,70 @@ class TestScheduler(unittest.TestCase):
         self.scheduler.enable_schedule("test_dag")
         self.assertTrue(self.scheduler.schedules["test_dag"].enabled)
 
+    def test_pending_runs(self):
+        storage_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_path)
+        scheduler = Scheduler(storage_path=storage_path)
+        scheduler.add_schedule(Schedule("due_dag", "custom"))
+        scheduler.add_schedule(Schedule("later_dag", "hourly"))
+
+        self.assertEqual(scheduler.get_pending_runs(), ["due_dag"])
+        self.assertEqual(scheduler.get_pending_runs(), ["due_dag"])
+
+        scheduler.disable_schedule("due_dag")
+        self.assertEqual(scheduler.get_pending_runs(), [])
+
+        scheduler.enable_schedule("due_dag")
+        scheduler.remove_schedule("due_dag")
+        self.assertEqual(scheduler.get_pending_runs(), [])
+        scheduler.flush()
+
+    def test_pending_saves_flushed_at_exit(self):
+        storage_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_path)
+        script = (
+            "from scheduler import Scheduler, Schedule\n"
+            f"scheduler = Scheduler(storage_path={storage_path!r})\n"
+            "for i in range(200):\n"
+            "    scheduler.add_schedule(Schedule(f'dag_{i}', 'daily'))\n"
+        )
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+        )
+
+        reloaded = Scheduler(storage_path=storage_path)
+        self.assertEqual(len(reloaded.schedules), 200)
+
+    def test_schedules_persisted(self):
+        sched = Schedule("test_dag", "interval", interval=30)
+        self.scheduler.add_schedule(sched)
+        self.scheduler.flush()
+
+        reloaded = Scheduler(storage_path="test_schedules")
+        self.assertEqual(reloaded.schedules["test_dag"].interval, 30)
+
+    def test_schedules_file_mode_matches_umask(self):
+        storage_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_path)
+        scheduler = Scheduler(storage_path=storage_path)
+        scheduler.add_schedule(Schedule("test_dag", "daily"))
+        scheduler.flush()
+
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = os.stat(os.path.join(storage_path, "schedules.json")).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o666 & ~umask)
+
+    def test_failed_write_leaves_no_temp_file(self):
+        storage_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_path)
+
+        with self.assertRaises(TypeError):
+            atomic_write(os.path.join(storage_path, "schedules.json"), "not bytes")
+        self.assertEqual(os.listdir(storage_path), [])
+
 
 class TestTriggers(unittest.TestCase):
     def setUp(self):
@@ -106,6 +366,51 @@ class TestTriggers(unittest.TestCase):
         self.assertEqual(result["trigger_id"], "trigger_1")
         self.assertIn("dag_1", result["triggered_dags"])
 
+    def test_remove_listener(self):
+        trigger = Trigger("trigger_1", TriggerType.MANUAL)
+        self.tm.register_trigger(trigger)
+        self.tm.add_listener("trigger_1", "dag_1")
+        self.tm.add_listener("trigger_1", "dag_2")
+        self.tm.add_listener("trigger_1", "dag_1")
+        self.tm.remove_listener("trigger_1", "dag_2")
+
+        result = self.tm.fire_trigger("trigger_1")
+        self.assertEqual(result["triggered_dags"], ["dag_1"])
+
+    def test_webhook_signature(self):
+        trigger = WebhookTrigger("webhook_1", secret="s3cret")
+        payload = '{"event": "push"}'
+        signature = hmac.new(b"s3cret", payload.encode(), hashlib.sha256).hexdigest()
+
+        self.assertTrue(trigger.verify_signature(payload, signature))
+        self.assertFalse(trigger.verify_signature(payload, "0" * 64))
+        self.assertFalse(trigger.verify_signature(payload, "not-hex"))
+        spaced = " ".join(
+            signature[i : i + 2].upper() for i in range(0, len(signature), 2)
+        )
+        self.assertFalse(trigger.verify_signature(payload, spaced))
+        self.assertFalse(trigger.verify_signature(payload, signature.upper()))
+
+
+class TestAPI(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_create_trigger(self):
+        response = self.client.post(
+            "/triggers", json={"trigger_id": "api_trigger", "trigger_type": "webhook"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_trigger_invalid_type(self):
+        for trigger_type in ("bogus", ["manual"], {"type": "manual"}, 1):
+            response = self.client.post(
+                "/triggers",
+                json={"trigger_id": "bad_trigger", "trigger_type": trigger_type},
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.get_json(), {"error": "invalid trigger_type"})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,14 @@
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from enum import Enum
+import hashlib
+import hmac
 import json
 import os
 
+_LOWER_HEX = frozenset("0123456789abcdef")
+
 
 class TriggerType(Enum):
     MANUAL = "manual"
@@ -20,6 +25,12 @@ class Trigger:
         self.config = config or {}
         self.created_at = datetime.now().isoformat()
         self.last_triggered = None
+        self._static_repr = {
+            "trigger_id": trigger_id,
+            "trigger_type": trigger_type.value,
+            "config": self.config,
+            "created_at": self.created_at,
+        }
 
     def fire(self, payload: Dict = None) -> Dict:
         self.last_triggered = datetime.now().isoformat()
@@ -31,36 +42,26 @@ class Trigger:
         }
 
     def to_dict(self) -> Dict:
-        return {
-            "trigger_id": self.trigger_id,
-            "trigger_type": self.trigger_type.value,
-            "config": self.config,
-            "created_at": self.created_at,
-            "last_triggered": self.last_triggered,
-        }
+        return {**self._static_repr, "last_triggered": self.last_triggered}
 
 
 class TriggerManager:
     def __init__(self, storage_path="triggers"):
         self.storage_path = storage_path
         self.triggers: Dict[str, Trigger] = {}
-        self.listeners: Dict[str, List[str]] = {}
+        # dag_id -> None per trigger: O(1) add/remove, keeps registration order.
+        self.listeners: Dict[str, Dict[str, None]] = {}
         os.makedirs(storage_path, exist_ok=True)
 
     def register_trigger(self, trigger: Trigger):
         self.triggers[trigger.trigger_id] = trigger
 
     def add_listener(self, trigger_id: str, dag_id: str):
-        if trigger_id not in self.listeners:
-            self.listeners[trigger_id] = []
-        if dag_id not in self.listeners[trigger_id]:
-            self.listeners[trigger_id].append(dag_id)
+        self.listeners.setdefault(trigger_id, {})[dag_id] = None
 
     def remove_listener(self, trigger_id: str, dag_id: str):
         if trigger_id in self.listeners:
-            self.listeners[trigger_id] = [
-                d for d in self.listeners[trigger_id] if d != dag_id
-            ]
+            self.listeners[trigger_id].pop(dag_id, None)
 
     def fire_trigger(self, trigger_id: str, payload: Dict = None) -> Optional[Dict]:
         if trigger_id not in self.triggers:
@@ -69,7 +70,7 @@ class TriggerManager:
         trigger = self.triggers[trigger_id]
         result = trigger.fire(payload)
 
-        triggered_dags = self.listeners.get(trigger_id, [])
+        triggered_dags = list(self.listeners.get(trigger_id, ()))
         result["triggered_dags"] = triggered_dags
 
         return result
@@ -86,18 +87,21 @@ class TriggerManager:
 class WebhookTrigger(Trigger):
     def __init__(self, trigger_id: str, secret: str = None):
         super().__init__(trigger_id, TriggerType.WEBHOOK, {"secret": secret})
-        self.received_events = []
+        self.received_events = deque(maxlen=1024)
+        self._secret_bytes = secret.encode() if secret else None
 
     def verify_signature(self, payload: str, signature: str) -> bool:
-        if not self.config.get("secret"):
+        if not self._secret_bytes:
             return True
-        import hashlib
-        import hmac
 
         expected = hmac.new(
-            self.config["secret"].encode(), payload.encode(), hashlib.sha256
-        ).hexdigest()
-        return hmac.compare_digest(expected, signature)
+            self._secret_bytes, payload.encode(), hashlib.sha256
+        ).digest()
+        # bytes.fromhex also accepts whitespace and uppercase; only take the
+        # exact lowercase hexdigest form.
+        if len(signature) != 64 or not _LOWER_HEX.issuperset(signature):
+            return False
+        return hmac.compare_digest(expected, bytes.fromhex(signature))
 
     def receive(self, payload: Dict) -> Dict:
         self.received_events.append(